@@ -1,13 +1,26 @@
+import math
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterator
 from sympy.ntheory import factorint
 
-"""
+def char_factors(n: int) -> list[int]:
+    """
     Returns the characteristic factors of n.
-"""
-def char_factors(n: int):
-    return reduce_char_factors(shanks_factorisation(n))
+
+    Equivalent to reduce_char_factors(shanks_factorisation(n)), but the
+    Shanks factors are grouped by prime as they are produced, so only the
+    short per-prime exponent lists are sorted.
+    """
+    assert n > 0, "n must be positive"
+    exponents: dict[int, list[int]] = {}
+    for (p, a) in _shanks_terms(n):
+        exponents.setdefault(p, []).append(a)
+    return _reduce_grouped([[p, sorted(v)] for (p, v) in exponents.items()])
 
 
-def shanks_factorisation(n: int) -> dict[int, list[int]]:
+def shanks_factorisation(n: int) -> list[tuple[int, int]]:
     """
     Uses the factorisation method described in [1] to produce
     the characteristic factors of the (Euler) totient of an integer n.
@@ -20,56 +33,76 @@ def shanks_factorisation(n: int) -> dict[int, list[int]]:
     2. If m >= 2, add the factor 2, then add 2^(m-2) if m > 2.
     3. Add the prime power factors of (p_i - 1), then add p_i^(a_i - 1) if a_i > 1.
 
+    Factors are returned as (p, a) pairs representing p^a, in no particular
+    order.
+
     Ref: [1] Shanks, D. Solved and Unsolved Problems in Number Theory, 2nd ed. p. 93, 1978.
     """
-    characteristic_factors = dict()
-    # add a new factor p^a
-    def _add_index(p, a):
-        if p not in characteristic_factors:
-            characteristic_factors[p] = [a]
-        else:
-            characteristic_factors[p].append(a)
+    assert n > 0, "n must be positive"
+    return list(_shanks_terms(n))
 
-    prime_factors = factorint(n)
+
+def _shanks_terms(n: int) -> Iterator[tuple[int, int]]:
+    """
+    Yield the (p, a) characteristic factors of shanks_factorisation.
+    n must be positive.
+    """
+    # split off the power of 2 with bit operations so only the odd part is factored
+    pow_2 = (n & -n).bit_length() - 1
+    prime_factors = _factorint(n >> pow_2)
 
     # for powers of 2:
     #   add 2 * 2^(a-2) for 2^a, a>=2
-    pow_2 = prime_factors.pop(2, 0)
     if pow_2 >= 2:
-        _add_index(2, 1)
+        yield (2, 1)
     if pow_2 > 2:
-        _add_index(2, pow_2 - 2)
+        yield (2, pow_2 - 2)
 
     # for each odd prime:
     #   pull out and factor (p - 1)
     #   add each to char factors
     #   add p^a-1 to char factors if a > 1
-    for (p,a) in prime_factors.items():
+    for (p,a) in prime_factors:
         if a > 1:
-            _add_index(p, a - 1)
-        lead_term_factors = factorint(p - 1)
-        for (q,b) in lead_term_factors.items():
-            _add_index(q, b)
+            yield (p, a - 1)
+        yield from _factorint(p - 1)
 
-    return {k:sorted(v) for (k,v) in characteristic_factors.items()}
+
+@lru_cache(maxsize=None)
+def _factorint(n: int) -> tuple[tuple[int, int], ...]:
+    """
+    Cached prime factorisation of n as sorted (prime, exponent) pairs.
+    Small values of p - 1 recur constantly across calls.
+    """
+    return tuple(sorted(factorint(n).items()))
 
 
-def reduce_char_factors(characteristic_factors: dict[int, list[int]]) -> list[int]:
+def reduce_char_factors(factors: list[tuple[int, int]]) -> list[int]:
     """
     Reduces the characteristic factors to a shorter form by combining coprime
-    elements.
+    elements. Factors are (p, a) pairs as returned by shanks_factorisation,
+    in any order.
 
     This is equivalent to converting a primary decomposition to an invariant factor
     decomposition.
     """
+    # sort once so groupby sees each prime once, with exponents in ascending order
+    active = [[p, [a for (_, a) in group]] for (p, group) in groupby(sorted(factors), key=itemgetter(0))]
+    return _reduce_grouped(active)
+
+
+def _reduce_grouped(active: list[list]) -> list[int]:
+    """
+    Combine [prime, exponents] pairs into invariant factors.
+    Each exponent list must be in ascending order and is consumed.
+    """
     reduced_factors = []
-    while len(characteristic_factors) > 0:
-        product = 1
+    while len(active) > 0:
         # multiply highest powers of each prime together
-        for key in characteristic_factors:
-            product *= key**(characteristic_factors[key].pop(-1))
-        reduced_factors.append(product)
-        # filter out any primes with no powers left
-        characteristic_factors = {k:v for (k,v) in characteristic_factors.items() if len(v) > 0}
-        
+        reduced_factors.append(math.prod(p**exponents.pop() for (p, exponents) in active))
+        # drop any primes with no powers left, in reverse so indices stay valid
+        for i in reversed(range(len(active))):
+            if not active[i][1]:
+                del active[i]
+
     return sorted(reduced_factors)
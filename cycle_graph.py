@@ -1,4 +1,5 @@
-from collections import OrderedDict
+import heapq
+from itertools import chain
 from sympy.combinatorics import PermutationGroup, Permutation, CyclicGroup
 import networkx as nx
 import matplotlib.pyplot as plt
@@ -15,33 +16,58 @@ def generate_maximal_cycles(G: PermutationGroup):
     4. repeat until all elements gone
     """
     cycles = []
-    # elements sorted by order
-    elements = OrderedDict(sorted({e:e.order() for e in G.elements}.items(), key=lambda item:item[1]))
+    # max-heap on order, ties broken towards later elements as with a stable sort
+    heap = [(-e.order(), -idx, e) for (idx, e) in enumerate(G.elements)]
+    heapq.heapify(heap)
+    # elements already in a cycle are skipped lazily when popped
+    covered = set()
     i = 0
-    while len(elements) > 0:
+    while len(heap) > 0:
+        (neg_order, _, g) = heapq.heappop(heap)
+        if g in covered:
+            continue
+        order = -neg_order
         i += 1
-        (g, order) = elements.popitem(last=True)
         #print(f'Iteration {i}: generating cycle for {g}')
         #sanity check
         assert (g**order).is_identity, f'Order for permuation {g} is incorrect, {g}**{order}={g**order} which is not identity'
 
-        cycle = [g**i for i in range(order)]
+        cycle = _powers(g, order)
         cycles.append(cycle)
 
-        # remove generated elements
-        elements = OrderedDict(sorted({k:v for (k,v) in elements.items() if k not in cycle}.items(), key=lambda item:item[1]))
+        # mark generated elements as removed
+        covered.update(cycle)
     return cycles
 
 
 def generate_permuation_cycle(g: Permutation):
-    return [g**i for i in range(g.order())]
+    return _powers(g, g.order())
+
+
+def _powers(g: Permutation, order: int) -> list[Permutation]:
+    """
+    Return [g**0, g**1, ..., g**(order-1)] by repeated multiplication
+    rather than computing each power from scratch.
+    """
+    powers = [g**0]
+    for _ in range(order - 1):
+        powers.append(powers[-1]*g)
+    return powers
 
 
 def generate_graph_from_cycles(cycles: list[list[Permutation]]):
+    """
+    Build the cycle graph with integer node ids.
+    Each node stores its element under the 'permutation' attribute.
+    """
     g = nx.Graph()
+    # unique elements in first-seen order, in a single pass
+    elements = list(dict.fromkeys(chain.from_iterable(cycles)))
+    ids = {e: i for (i, e) in enumerate(elements)}
+    g.add_nodes_from((i, {'permutation': e}) for (i, e) in enumerate(elements))
 
     for cycle in cycles:
         # edge for each adjacent pair
-        g.add_edges_from([(str(cycle[i]), str(cycle[i+1])) for i in range(len(cycle) - 1)])
-        g.add_edge(str(cycle[-1]), str(cycle[0]))
+        g.add_edges_from([(ids[cycle[i]], ids[cycle[i+1]]) for i in range(len(cycle) - 1)])
+        g.add_edge(ids[cycle[-1]], ids[cycle[0]])
     return g
\ No newline at end of file
@@ -1,8 +1,9 @@
-from sympy import igcd
-from sympy.ntheory import divisors
-from sympy.functions.combinatorial.numbers import totient
+from functools import lru_cache
+from itertools import compress, product
+from sympy.ntheory import divisors, primefactors
 from sympy.combinatorics import CyclicGroup, Coset, PermutationGroup, Permutation
 from typing import NamedTuple
+from collections import defaultdict
 import networkx as nx
 
 class QuotientGroup(NamedTuple):
@@ -51,22 +52,18 @@ def subgroups_of_cycle_product(G: PermutationGroup, H: PermutationGroup) -> list
     assert G.is_cyclic and H.is_cyclic, "Groups must be cyclic"
     
     subgroups: list[TupleSubgroup] = []
-    o_G = G.order()
-    g = G.generators[0]
-    o_H = H.order()
-    h = H.generators[0]
+    # build each cyclic subgroup once, keyed by order, rather than per tuple
+    subs_G = subgroups_of_cyclic_group(G)
+    subs_H = subgroups_of_cyclic_group(H)
 
-    tuples = _generate_tuples(o_G, o_H)
+    tuples = _generate_tuples(G.order(), H.order())
     for t in tuples:
-        # subgroup of G with order n can be generated by g**(G.order()/n) where g is a generator of G
-        G1 = G.subgroup([g**(o_G//t.G1)])
-        G2 = G.subgroup([g**(o_G//t.G2)])
-        H1 = H.subgroup([h**(o_H//t.H1)])
-        H2 = H.subgroup([h**(o_H//t.H2)])
-        # this is probably slow but numbers should all be small.
-        # max statement required for case where order = 1
-        coprimes = [i for i in range(1, max(t.order, 2)) if igcd(i, t.order) == 1]
-        assert len(coprimes) == totient(t.order), f'Error finding coprimes, expected {totient(t.order)}, found {len(coprimes)}'
+        G1 = subs_G[t.G1]
+        G2 = subs_G[t.G2]
+        H1 = subs_H[t.H1]
+        H2 = subs_H[t.H2]
+        # generators of the quotient are the powers coprime to its order
+        coprimes = _coprimes(t.order)
 
         for j in coprimes:
             f: Isomorphism = (G1.generators[0], H1.generators[0]**j)
@@ -91,17 +88,40 @@ def _generate_tuples(n: int, m: int) -> list[GoursatTuple]:
     """
     quotients_G = _subquotients(n)
     quotients_H = _subquotients(m)
-    # find all pairs with equal order
-    pairs = [(a,b) for a in quotients_G for b in quotients_H if a.order == b.order]
+    # bucket quotients of H by order so only pairs with equal order are visited
+    buckets_H: defaultdict[int, list[QuotientGroup]] = defaultdict(list)
+    for b in quotients_H:
+        buckets_H[b.order].append(b)
     # create tuples
-    return [GoursatTuple(a.G1, a.G2, b.G1, b.G2, a.order) for (a,b) in pairs]
+    return [GoursatTuple(a.G1, a.G2, b.G1, b.G2, a.order) for a in quotients_G for b in buckets_H[a.order]]
 
 
 def _subquotients(n: int) -> list[QuotientGroup]:
     """
     Find the subquotients of a cycle group of order n.
     """
-    return [QuotientGroup(a, b, a//b) for a in divisors(n) for b in divisors(a)]
+    # divisors of a divisor of n are themselves divisors of n
+    ds = _divisors(n)
+    return [QuotientGroup(a, b, a//b) for a in ds for b in ds if b <= a and a % b == 0]
+
+
+@lru_cache(maxsize=None)
+def _divisors(n: int) -> tuple[int, ...]:
+    """Cached ascending divisors of n."""
+    return tuple(divisors(n))
+
+
+@lru_cache(maxsize=None)
+def _coprimes(n: int) -> tuple[int, ...]:
+    """
+    Cached integers in [1, n) coprime to n.
+    Returns (1,) for n = 1 so the trivial quotient still has an isomorphism.
+    """
+    # sieve out multiples of each prime factor of n rather than taking a gcd per integer
+    flags = bytearray(b'\x01') * max(n, 2)
+    for p in primefactors(n):
+        flags[::p] = bytes(len(flags[::p]))
+    return tuple(compress(range(1, len(flags)), flags[1:]))
 
 
 def _subgroup_from_tuple(G1: PermutationGroup, G2: PermutationGroup, H1: PermutationGroup, H2: PermutationGroup, f: Isomorphism) -> TupleSubgroup:
@@ -123,20 +143,15 @@ def _subgroup_from_tuple(G1: PermutationGroup, G2: PermutationGroup, H1: Permuta
     assert G1.is_cyclic and H1.is_cyclic, "Groups must be cyclic"
     assert G1.contains(g) and H1.contains(h), "Isomorphism generators must be from G1 and H1"
 
-    # iterating up to index should generate all cosets
+    # g and h generate G1 and H1, so powers up to the index give every coset exactly once
     index = G1.order()//G2.order()
-    coset_maps = {Coset(g**i, G2, G1): Coset(h**i, H2, H1) for i in range(index)}
-
-    # make sure the cosets cover the whole group
-    coset_coverage = {e for coset in coset_maps.keys() for e in coset.as_list()}
-    assert coset_coverage == set(G1.elements), "Failure generating cosets of G2 in G1"
-    coset_coverage = {e for coset in coset_maps.values() for e in coset.as_list()}
-    assert coset_coverage == set(H1.elements), "Failure generating cosets of H2 in H1"
+    # cosets are paired by index, f((g^i)G2) = (h^i)H2
+    cosets_G = [Coset(g**i, G2, G1).as_list() for i in range(index)]
+    cosets_H = [Coset(h**i, H2, H1).as_list() for i in range(index)]
 
     elements = []
-    for k,v in coset_maps.items():
-        pairs = [(a,b) for a in k.as_list() for b in v.as_list()]
-        elements.extend(pairs)
+    for (coset_G, coset_H) in zip(cosets_G, cosets_H):
+        elements.extend(product(coset_G, coset_H))
     return elements
 
 
@@ -160,7 +175,7 @@ def subgroups_of_cyclic_group(G: PermutationGroup) -> dict[int, PermutationGroup
     g = G.generators[0]
     # subgroups are all cycles with order that divide the group order.
     # they can be generated by powers of the group generator.
-    return {o//i : G.subgroup([g**i]) for i in divisors(o)}
+    return {o//i : G.subgroup([g**i]) for i in _divisors(o)}
 
 
 def enumerate_cosets(G: PermutationGroup, H: PermutationGroup) -> list[Coset]:
@@ -176,7 +191,18 @@ def enumerate_cosets(G: PermutationGroup, H: PermutationGroup) -> list[Coset]:
 
 
 def generate_hasse_graph(l: list[TupleSubgroup]):
-    ls = [set(e) for e in l]
-    edges = [(a,b) for a in range(len(ls)) for b in range(len(ls)) if a != b and ls[b].issubset(ls[a])]
-    g = nx.DiGraph(edges)
-    return nx.transitive_reduction(g)
\ No newline at end of file
+    ls = [frozenset(e) for e in l]
+    sizes = [len(s) for s in ls]
+    by_size = sorted(range(len(ls)), key=sizes.__getitem__)
+    edges = []
+    for (i, b) in enumerate(by_size):
+        # walking upwards by size, a supergroup covers b unless it contains an
+        # earlier cover, which would lie strictly between them
+        covers_b = []
+        for a in by_size[i+1:]:
+            # by Lagrange a proper supergroup must have an order that is a multiple of |b|
+            if sizes[a] > sizes[b] and sizes[a] % sizes[b] == 0 and ls[b] <= ls[a]:
+                if not any(ls[c] <= ls[a] for c in covers_b):
+                    covers_b.append(a)
+        edges.extend((a,b) for a in covers_b)
+    return nx.DiGraph(edges)
\ No newline at end of file